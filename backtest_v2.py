@@ -41,8 +41,8 @@ def main():
     
     if results_df is not None and not results_df.empty:
         # Sauvegarder les résultats
-        results_df.to_csv("/data/backtest_results.csv", index=False)
-        print(f"\n💾 Résultats sauvegardés dans /data/backtest_results.csv")
+        results_df.to_parquet("/data/backtest_results.parquet", index=False)
+        print(f"\n💾 Résultats sauvegardés dans /data/backtest_results.parquet")
         
         # Afficher l'analyse globale
         if "_global" in analyses:
@@ -3,20 +3,134 @@
 # Gestion de la configuration (base de données + YAML)
 
 import os
+import copy
 import yaml
 import sqlite3
 import json
 import logging
+import threading
+from contextlib import contextmanager
 from typing import Dict, Optional, List
 
 
 DATABASE_PATH = "/data/bot_config.db"
 
+# orjson (optionnel) décode 2-5x plus vite que le json standard
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Premiers caractères possibles d'une valeur JSON (objet, tableau, chaîne,
+# booléen, null, nombre): tout autre contenu est une chaîne brute
+_JSON_PREFIXES = frozenset('{["tfn-0123456789')
+
+
+def _decode_config_value(value: str):
+    """
+    Décode une valeur de la table config: JSON si plausible, sinon chaîne brute.
+
+    Le test de préfixe évite de payer une exception pour chaque valeur
+    stockée en texte brut (webhook_url, data_period, ...).
+    """
+    if not value or value[0] not in _JSON_PREFIXES:
+        return value
+    try:
+        return _json_loads(value)
+    except ValueError:
+        # Ressemble à du JSON mais n'en est pas: garder la chaîne
+        return value
+
+# Parseur C (libyaml) si disponible: ~10x plus rapide que le parseur pur Python
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Cache des fichiers YAML parsés: {chemin: (mtime_ns, taille, dict parsé)}
+_YAML_CACHE: Dict[str, tuple] = {}
+
+
+def _load_yaml_file(path: str) -> Dict:
+    """
+    Charge et parse un fichier YAML, avec cache invalidé par (mtime, taille).
+
+    Tant que le fichier n'a pas changé sur disque, les appels suivants
+    retournent le dict déjà parsé sans repasser par yaml.
+    """
+    st = os.stat(path)
+    cached = _YAML_CACHE.get(path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    with open(path, "r") as f:
+        cfg = yaml.load(f, Loader=_YAML_LOADER) or {}
+
+    _YAML_CACHE[path] = (st.st_mtime_ns, st.st_size, cfg)
+    return cfg
+
+
+def _apply_pragmas(conn: sqlite3.Connection):
+    """
+    Applique les PRAGMAs de performance, une seule fois par connexion physique.
+
+    WAL permet les lectures concurrentes pendant les écritures,
+    synchronous=NORMAL évite un fsync par écriture (sans risque de corruption
+    en WAL), et foreign_keys=ON est requis pour le ON DELETE CASCADE de
+    profile_weights.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA foreign_keys=ON")
+
+
+# Valeurs par défaut de la configuration (fusionnées sous le YAML puis les
+# overrides DB). Ne jamais muter: _build_config en fait une copie par fusion.
+_DEFAULTS = {
+    "data_period": "365d",
+    "drawdown_cap": 0.25,
+    "volatility_cap": 0.10,
+    "output_csv": "/data/scores_history.csv",
+    "log_file": "/data/bot_daily_score.log",
+    "timezone": "Europe/Paris",
+    "dev_mode": False,
+    "schedule_hour": 22,
+    "schedule_minute": 10,
+    "weights": {
+        "drawdown90": 0.25,
+        "rsi14": 0.25,
+        "dist_ma50": 0.20,
+        "momentum30": 0.15,
+        "trend_ma200": 0.10,
+        "volatility20": 0.05,
+    },
+}
+
+
+# Version du schéma, stockée dans PRAGMA user_version (0 = non initialisé)
+SCHEMA_VERSION = 1
+
 
 def init_database():
-    """Initialise la base de données SQLite pour stocker la configuration."""
-    conn = sqlite3.connect(DATABASE_PATH)
+    """
+    Initialise la base de données SQLite pour stocker la configuration.
+
+    user_version sert de marqueur "schéma à jour": une fois initialisée,
+    les démarrages suivants ne préparent plus aucun CREATE TABLE — seule
+    la lecture du PRAGMA est payée. Incrémenter SCHEMA_VERSION pour
+    introduire une migration.
+    """
+    conn = sqlite3.connect(DATABASE_PATH, isolation_level=None)
+    _apply_pragmas(conn)
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        conn.close()
+        return
+
     cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
     
     # Table de configuration
     cursor.execute("""
@@ -70,8 +184,25 @@ def init_database():
             PRIMARY KEY (profile_id, formula_name)
         )
     """)
-    
-    conn.commit()
+
+    # Index couvrant: "poids d'un profil" devient un parcours d'index pur,
+    # sans aller chercher la ligne (la PK ne couvre pas la colonne weight)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pw_profile_cover
+        ON profile_weights(profile_id, formula_name, weight)
+    """)
+
+    # Index partiel pour la requête très fréquente get_tickers(enabled_only=True)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickers_enabled
+        ON tickers(enabled) WHERE enabled = 1
+    """)
+
+    # Statistiques pour le planificateur
+    cursor.execute("ANALYZE")
+
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    cursor.execute("COMMIT")
     conn.close()
 
 
@@ -81,15 +212,89 @@ class ConfigManager:
     def __init__(self, yaml_path: str = "/app/config.yaml"):
         self.yaml_path = yaml_path
         self.db_path = DATABASE_PATH
-        
-        # Initialiser la DB si nécessaire
-        if not os.path.exists(self.db_path):
-            init_database()
-    
+        # Une connexion SQLite persistante par thread (voir _get_db_connection)
+        self._local = threading.local()
+
+        # Cache de la configuration fusionnée (YAML + DB), invalidé par les
+        # écritures. Le YAML n'étant modifié qu'à l'arrêt du bot, seules les
+        # écritures DB invalident ce cache.
+        self._config_cache: Optional[Dict] = None
+        self._cache_lock = threading.Lock()
+
+        # Initialiser la DB si nécessaire (no-op dès que user_version est posé;
+        # couvre aussi le cas d'un fichier présent mais sans tables)
+        init_database()
+
     def _get_db_connection(self):
-        """Obtient une connexion à la base de données."""
-        return sqlite3.connect(self.db_path)
+        """
+        Obtient la connexion à la base de données du thread courant.
+
+        La connexion est créée au premier accès puis réutilisée: ouvrir une
+        connexion par appel payait l'ouverture du fichier (et de ses -wal/-shm)
+        plus la relecture du schéma à chaque opération.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                   isolation_level=None)
+            _apply_pragmas(conn)
+            # Lignes accessibles par nom de colonne, construites côté C
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
     
+    @contextmanager
+    def _transaction(self):
+        """
+        Encadre une écriture dans une transaction explicite (BEGIN IMMEDIATE).
+
+        À l'intérieur d'un batch() la transaction englobante est réutilisée:
+        pas de BEGIN/COMMIT imbriqué, les écritures sont groupées sous un
+        seul fsync final.
+        """
+        conn = self._get_db_connection()
+        if getattr(self._local, "in_batch", False):
+            yield conn
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @contextmanager
+    def batch(self):
+        """
+        Groupe plusieurs écritures dans une seule transaction.
+
+        Exemple:
+            with config_manager.batch():
+                config_manager.set_formula(...)
+                config_manager.set_formula_weight(...)
+
+        Un seul COMMIT (donc un seul fsync WAL) à la sortie du bloc;
+        ROLLBACK de l'ensemble si une exception est levée.
+        """
+        conn = self._get_db_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.in_batch = True
+        try:
+            yield self
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._local.in_batch = False
+            # Invalider après COMMIT comme après ROLLBACK: pendant la
+            # transaction, un autre thread (qui ne voit que l'état pré-batch)
+            # a pu repeupler le cache, et les invalidations des écritures du
+            # bloc ont eu lieu avant que le COMMIT ne rende l'état visible
+            self._invalidate_config_cache()
+
     def load_yaml_config(self) -> Dict:
         """Charge la configuration depuis le fichier YAML."""
         if not os.path.exists(self.yaml_path):
@@ -97,86 +302,100 @@ class ConfigManager:
             return {}
         
         try:
-            with open(self.yaml_path, "r") as f:
-                cfg = yaml.safe_load(f)
-            return cfg or {}
+            cfg = _load_yaml_file(self.yaml_path)
         except Exception as e:
             logging.error(f"❌ Erreur lors de la lecture du fichier YAML: {e}")
             return {}
+
+        # Copie défensive: get_config() modifie le dictionnaire retourné
+        return copy.deepcopy(cfg)
     
+    def _invalidate_config_cache(self):
+        """Invalide le cache de configuration (à appeler après toute écriture DB)."""
+        with self._cache_lock:
+            self._config_cache = None
+
     def get_config(self) -> Dict:
         """
         Obtient la configuration complète (YAML + DB overrides).
         La DB a priorité sur le YAML pour les valeurs modifiables.
+
+        Le résultat est mis en cache jusqu'à la prochaine écriture DB;
+        chaque appel retourne une copie indépendante.
         """
-        # Charger la base YAML
-        config = self.load_yaml_config()
-        
-        # Valeurs par défaut
-        config.setdefault("data_period", "365d")
-        config.setdefault("drawdown_cap", 0.25)
-        config.setdefault("volatility_cap", 0.10)
-        config.setdefault("output_csv", "/data/scores_history.csv")
-        config.setdefault("log_file", "/data/bot_daily_score.log")
-        config.setdefault("timezone", "Europe/Paris")
-        config.setdefault("dev_mode", False)
-        config.setdefault("schedule_hour", 22)
-        config.setdefault("schedule_minute", 10)
-        
-        if "weights" not in config:
-            config["weights"] = {}
-        config["weights"].setdefault("drawdown90", 0.25)
-        config["weights"].setdefault("rsi14", 0.25)
-        config["weights"].setdefault("dist_ma50", 0.20)
-        config["weights"].setdefault("momentum30", 0.15)
-        config["weights"].setdefault("trend_ma200", 0.10)
-        config["weights"].setdefault("volatility20", 0.05)
-        
+        with self._cache_lock:
+            if self._config_cache is not None:
+                return copy.deepcopy(self._config_cache)
+
+        config = self._build_config()
+
+        # Dans un batch(), la lecture voit les écritures non commitées de la
+        # transaction en cours: ne jamais les mettre en cache (elles peuvent
+        # encore être annulées par un ROLLBACK)
+        if getattr(self._local, "in_batch", False):
+            return config
+
+        with self._cache_lock:
+            self._config_cache = config
+        return copy.deepcopy(config)
+
+    def _build_config(self) -> Dict:
+        """Construit la configuration fusionnée (YAML + défauts + overrides DB)."""
+        # Charger la base YAML et la fusionner au-dessus des défauts
+        # (une seule fusion de dicts au lieu d'une chaîne de setdefault)
+        loaded = self.load_yaml_config()
+        config = {
+            **_DEFAULTS,
+            **loaded,
+            "weights": {**_DEFAULTS["weights"], **loaded.get("weights", {})},
+        }
+
+
         # Overrides depuis la DB
         try:
             conn = self._get_db_connection()
-            cursor = conn.cursor()
-            
-            # Récupérer les valeurs de config DB
-            cursor.execute("SELECT key, value FROM config")
-            for key, value in cursor.fetchall():
-                try:
-                    # Essayer de parser en JSON
-                    parsed_value = json.loads(value)
-                    
+
+            # Une seule requête (un seul aller-retour Python/SQLite) pour les
+            # trois tables, les lignes étant discriminées par la colonne t
+            rows = conn.execute("""
+                SELECT 1 AS t, key, value, NULL FROM config
+                UNION ALL
+                SELECT 2, name, formula, weight FROM formulas
+                UNION ALL
+                SELECT 3, symbol, NULL, NULL FROM tickers WHERE enabled = 1
+            """).fetchall()
+
+            formulas = {}
+            formula_weights = {}
+            db_tickers = []
+
+            for t, a, b, c in rows:
+                if t == 1:
+                    # Valeur de config (a=clé, b=valeur)
+                    parsed_value = _decode_config_value(b)
+
                     # Gérer les clés imbriquées (ex: weights.drawdown90)
-                    if "." in key:
-                        parts = key.split(".")
+                    if "." in a:
+                        parts = a.split(".")
                         current = config
                         for part in parts[:-1]:
-                            if part not in current:
-                                current[part] = {}
-                            current = current[part]
+                            current = current.setdefault(part, {})
                         current[parts[-1]] = parsed_value
                     else:
-                        config[key] = parsed_value
-                except json.JSONDecodeError:
-                    # Si ce n'est pas du JSON, garder comme string
-                    config[key] = value
-            
-            # Récupérer les formules personnalisées
-            cursor.execute("SELECT name, formula, weight FROM formulas")
-            formulas = {}
-            formula_weights = {}
-            for name, formula, weight in cursor.fetchall():
-                formulas[name] = formula
-                formula_weights[name] = weight
+                        config[a] = parsed_value
+                elif t == 2:
+                    # Formule personnalisée (a=nom, b=formule, c=poids)
+                    formulas[a] = b
+                    formula_weights[a] = c
+                else:
+                    # Ticker actif (a=symbole)
+                    db_tickers.append(a)
+
             if formulas:
                 config["formulas"] = formulas
                 config["formula_weights"] = formula_weights
-            
-            # Récupérer les tickers actifs
-            cursor.execute("SELECT symbol FROM tickers WHERE enabled = 1")
-            db_tickers = [row[0] for row in cursor.fetchall()]
             if db_tickers:
                 config["tickers"] = db_tickers
-            
-            conn.close()
         except Exception as e:
             logging.error(f"Erreur lors de la lecture de la DB: {e}")
         
@@ -184,25 +403,38 @@ class ConfigManager:
     
     def set_config_value(self, key: str, value, description: str = ""):
         """Définit une valeur de configuration dans la DB."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
         # Convertir en JSON si nécessaire
         if not isinstance(value, str):
             value = json.dumps(value)
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO config (key, value, description, updated_at)
-            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-        """, (key, value, description))
-        
-        conn.commit()
-        conn.close()
+
+        # Upsert en place (pas de DELETE+INSERT comme avec OR REPLACE),
+        # et aucune écriture si la valeur n'a pas changé
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT INTO config (key, value, description, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    description = excluded.description,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE value <> excluded.value
+                   OR description IS NOT excluded.description
+            """, (key, value, description))
+
+        self._invalidate_config_cache()
     
     def get_config_value(self, key: str, default=None):
         """Récupère une valeur de configuration."""
-        config = self.get_config()
-        
+        # Lecture directe du cache (sans copie): l'appelant ne reçoit qu'une
+        # valeur, jamais le dict complet
+        with self._cache_lock:
+            config = self._config_cache
+        if config is None:
+            # Utiliser directement le dict retourné: relire le cache ici
+            # pourrait observer une invalidation concurrente (cache remis
+            # à None par une écriture) et renvoyer default à tort
+            config = self.get_config()
+
         # Gérer les clés imbriquées
         if "." in key:
             parts = key.split(".")
@@ -212,22 +444,57 @@ class ConfigManager:
                     current = current[part]
                 else:
                     return default
-            return current
-        
-        return config.get(key, default)
-    
+        else:
+            current = config.get(key, default)
+
+        # Ne jamais exposer un conteneur interne du cache
+        if isinstance(current, (dict, list)):
+            return copy.deepcopy(current)
+        return current
+
+    def get_raw_config_value(self, key: str, default=None):
+        """
+        Récupère une valeur de configuration par lecture directe de la table.
+
+        Chemin rapide pour une clé simple de premier niveau: un seul SELECT
+        sur la clé primaire, sans construire la configuration fusionnée.
+        Pour les clés imbriquées (ex: "weights.rsi14") ou les valeurs issues
+        uniquement du YAML fusionné, utiliser get_config_value.
+        """
+        conn = self._get_db_connection()
+        row = conn.execute("SELECT value FROM config WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return _decode_config_value(row[0])
+
+        # Pas d'override DB: YAML (lecture cachée) puis défauts
+        yaml_cfg = self.load_yaml_config()
+        if key in yaml_cfg:
+            return yaml_cfg[key]
+
+        value = _DEFAULTS.get(key, default)
+        # Ne jamais exposer un conteneur de _DEFAULTS: une mutation par
+        # l'appelant corromprait les défauts de tout le process
+        if isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
+
     def set_formula(self, name: str, formula: str, weight: float = 0.0, description: str = ""):
         """Définit une formule personnalisée."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO formulas (name, formula, weight, description, updated_at)
-            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (name, formula, weight, description))
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT INTO formulas (name, formula, weight, description, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(name) DO UPDATE SET
+                    formula = excluded.formula,
+                    weight = excluded.weight,
+                    description = excluded.description,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE formula <> excluded.formula
+                   OR weight IS NOT excluded.weight
+                   OR description IS NOT excluded.description
+            """, (name, formula, weight, description))
+
+        self._invalidate_config_cache()
     
     def get_formulas(self) -> Dict[str, Dict[str, any]]:
         """Récupère toutes les formules personnalisées avec leurs poids."""
@@ -244,103 +511,82 @@ class ConfigManager:
             for name, formula, weight, description in cursor.fetchall()
         }
         
-        conn.close()
         return formulas
     
     def set_formula_weight(self, name: str, weight: float):
         """Modifie le poids d'une formule."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE formulas SET weight = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE name = ?
-        """, (weight, name))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._transaction() as conn:
+            conn.execute("""
+                UPDATE formulas SET weight = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE name = ?
+            """, (weight, name))
+
+        self._invalidate_config_cache()
+
     def delete_formula(self, name: str):
         """Supprime une formule personnalisée."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM formulas WHERE name = ?", (name,))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM formulas WHERE name = ?", (name,))
+
+        self._invalidate_config_cache()
+
     def add_ticker(self, symbol: str):
         """Ajoute un ticker à surveiller."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO tickers (symbol, enabled, added_at)
-            VALUES (?, 1, CURRENT_TIMESTAMP)
-        """, (symbol,))
-        
-        conn.commit()
-        conn.close()
-    
+        # Préserve added_at si le ticker existe déjà; ne réécrit la ligne
+        # que pour le réactiver
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT INTO tickers (symbol, enabled, added_at)
+                VALUES (?, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT(symbol) DO UPDATE SET enabled = 1
+                WHERE enabled <> 1
+            """, (symbol,))
+
+        self._invalidate_config_cache()
+
     def remove_ticker(self, symbol: str):
         """Supprime un ticker."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM tickers WHERE symbol = ?", (symbol,))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tickers WHERE symbol = ?", (symbol,))
+
+        self._invalidate_config_cache()
+
     def toggle_ticker(self, symbol: str, enabled: bool):
         """Active ou désactive un ticker."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE tickers SET enabled = ? WHERE symbol = ?
-        """, (1 if enabled else 0, symbol))
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as conn:
+            conn.execute("""
+                UPDATE tickers SET enabled = ? WHERE symbol = ?
+            """, (1 if enabled else 0, symbol))
+
+        self._invalidate_config_cache()
     
     def get_tickers(self, enabled_only: bool = True) -> List[str]:
         """Récupère la liste des tickers."""
         conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        if enabled_only:
-            cursor.execute("SELECT symbol FROM tickers WHERE enabled = 1")
-        else:
-            cursor.execute("SELECT symbol FROM tickers")
-        
-        tickers = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
-        # Si pas de tickers en DB, utiliser ceux du YAML
-        if not tickers:
-            config = self.load_yaml_config()
-            tickers = config.get("tickers", [])
-        
-        return tickers
+        rows = conn.execute(
+            "SELECT symbol FROM tickers WHERE enabled = 1" if enabled_only
+            else "SELECT symbol FROM tickers"
+        ).fetchall()
+
+        if rows:
+            return [row[0] for row in rows]
+
+        # Si pas de tickers en DB, utiliser ceux du YAML (lecture cachée)
+        return self.load_yaml_config().get("tickers", [])
     
     # === Gestion des profils de poids ===
     
     def create_weight_profile(self, name: str, description: str = "") -> int:
         """Crée un nouveau profil de poids."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO weight_profiles (name, description)
-            VALUES (?, ?)
-        """, (name, description))
-        
-        profile_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
+        with self._transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO weight_profiles (name, description)
+                VALUES (?, ?)
+            """, (name, description))
+            profile_id = cursor.lastrowid
+
+        self._invalidate_config_cache()
+
         return profile_id
     
     def get_weight_profiles(self) -> List[Dict]:
@@ -353,20 +599,11 @@ class ConfigManager:
             FROM weight_profiles
             ORDER BY name
         """)
-        
-        profiles = []
-        for row in cursor.fetchall():
-            profiles.append({
-                'id': row[0],
-                'name': row[1],
-                'description': row[2],
-                'is_active': bool(row[3]),
-                'created_at': row[4],
-                'updated_at': row[5]
-            })
-        
-        conn.close()
-        return profiles
+
+        return [
+            {**dict(row), 'is_active': bool(row['is_active'])}
+            for row in cursor.fetchall()
+        ]
     
     def get_active_profile(self) -> Optional[Dict]:
         """Récupère le profil actuellement actif."""
@@ -381,75 +618,56 @@ class ConfigManager:
         """)
         
         row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                'id': row[0],
-                'name': row[1],
-                'description': row[2],
-                'created_at': row[3],
-                'updated_at': row[4]
-            }
-        return None
+
+        return dict(row) if row else None
     
     def set_active_profile(self, profile_id: int):
         """Définit le profil actif et charge ses poids dans les formules."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        # Désactiver tous les profils
-        cursor.execute("UPDATE weight_profiles SET is_active = 0")
-        
-        # Activer le profil sélectionné
-        cursor.execute("""
-            UPDATE weight_profiles 
-            SET is_active = 1, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (profile_id,))
-        
-        # Charger les poids du profil et les appliquer aux formules
-        cursor.execute("""
-            SELECT formula_name, weight
-            FROM profile_weights
-            WHERE profile_id = ?
-        """, (profile_id,))
-        
-        for formula_name, weight in cursor.fetchall():
-            cursor.execute("""
-                UPDATE formulas 
-                SET weight = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE name = ?
-            """, (weight, formula_name))
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as conn:
+            # Désactiver tous les profils
+            conn.execute("UPDATE weight_profiles SET is_active = 0")
+
+            # Activer le profil sélectionné
+            conn.execute("""
+                UPDATE weight_profiles
+                SET is_active = 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (profile_id,))
+
+            # Appliquer les poids du profil aux formules: un seul UPDATE
+            # corrélé côté SQLite au lieu d'un UPDATE par formule
+            conn.execute("""
+                UPDATE formulas
+                SET weight = (SELECT pw.weight FROM profile_weights pw
+                              WHERE pw.profile_id = ? AND pw.formula_name = formulas.name),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE name IN (SELECT formula_name FROM profile_weights WHERE profile_id = ?)
+            """, (profile_id, profile_id))
+
+        # Les poids des formules ont changé
+        self._invalidate_config_cache()
     
     def save_profile_weights(self, profile_id: int, weights: Dict[str, float]):
-        """Sauvegarde les poids dans un profil."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        # Supprimer les anciens poids du profil
-        cursor.execute("DELETE FROM profile_weights WHERE profile_id = ?", (profile_id,))
-        
-        # Insérer les nouveaux poids
-        for formula_name, weight in weights.items():
-            cursor.execute("""
+        """Sauvegarde les poids dans un profil (une seule transaction)."""
+        # Une transaction unique: un seul fsync au COMMIT au lieu d'un
+        # auto-commit par ligne insérée
+        with self._transaction() as conn:
+            # Supprimer les anciens poids du profil
+            conn.execute("DELETE FROM profile_weights WHERE profile_id = ?", (profile_id,))
+
+            # Insérer les nouveaux poids en lot
+            conn.executemany("""
                 INSERT INTO profile_weights (profile_id, formula_name, weight)
                 VALUES (?, ?, ?)
-            """, (profile_id, formula_name, weight))
-        
-        # Mettre à jour la date de modification du profil
-        cursor.execute("""
-            UPDATE weight_profiles 
-            SET updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (profile_id,))
-        
-        conn.commit()
-        conn.close()
-    
+            """, [(profile_id, name, weight) for name, weight in weights.items()])
+
+            # Mettre à jour la date de modification du profil
+            conn.execute("""
+                UPDATE weight_profiles
+                SET updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (profile_id,))
+
     def get_profile_weights(self, profile_id: int) -> Dict[str, float]:
         """Récupère les poids d'un profil."""
         conn = self._get_db_connection()
@@ -462,45 +680,55 @@ class ConfigManager:
         """, (profile_id,))
         
         weights = {formula_name: weight for formula_name, weight in cursor.fetchall()}
-        conn.close()
         
         return weights
     
     def delete_weight_profile(self, profile_id: int):
         """Supprime un profil de poids."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
-        # Les poids associés seront supprimés automatiquement (CASCADE)
-        cursor.execute("DELETE FROM weight_profiles WHERE id = ?", (profile_id,))
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as conn:
+            # Les poids associés seront supprimés automatiquement (CASCADE)
+            conn.execute("DELETE FROM weight_profiles WHERE id = ?", (profile_id,))
+
+        self._invalidate_config_cache()
     
     def save_current_weights_to_profile(self, profile_id: int):
         """Sauvegarde les poids actuels des formules dans un profil."""
-        formulas = self.get_formulas()
-        weights = {name: data['weight'] for name, data in formulas.items()}
-        self.save_profile_weights(profile_id, weights)
+        # Copie entièrement côté SQLite (INSERT ... SELECT): pas besoin de
+        # rapatrier les formules en Python pour les réinsérer ligne à ligne
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM profile_weights WHERE profile_id = ?", (profile_id,))
+
+            conn.execute("""
+                INSERT INTO profile_weights (profile_id, formula_name, weight)
+                SELECT ?, name, weight FROM formulas
+            """, (profile_id,))
+
+            conn.execute("""
+                UPDATE weight_profiles
+                SET updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (profile_id,))
     
     def update_profile_info(self, profile_id: int, name: str = None, description: str = None):
-        """Met à jour les informations d'un profil."""
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
-        
+        """Met à jour les informations d'un profil (un seul UPDATE)."""
+        sets = []
+        args = []
         if name is not None:
-            cursor.execute("""
-                UPDATE weight_profiles 
-                SET name = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (name, profile_id))
-        
+            sets.append("name = ?")
+            args.append(name)
         if description is not None:
-            cursor.execute("""
-                UPDATE weight_profiles 
-                SET description = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (description, profile_id))
-        
-        conn.commit()
-        conn.close()
+            sets.append("description = ?")
+            args.append(description)
+        if not sets:
+            return
+
+        sets.append("updated_at = CURRENT_TIMESTAMP")
+        args.append(profile_id)
+
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE weight_profiles SET {', '.join(sets)} WHERE id = ?",
+                args,
+            )
+
+        self._invalidate_config_cache()
@@ -7,11 +7,62 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 from datetime import datetime, timezone
+from types import MappingProxyType
 from typing import Dict, Optional
 
+# Historique minimal (en barres) pour qu'un score soit calculable: la MA200
+# est l'indicateur à la fenêtre la plus longue
+MIN_HISTORY_DAYS = 200
+
+# numba est optionnel: si présent, le calcul du RSI est compilé en code natif
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _rsi_kernel(close: np.ndarray, period: int) -> np.ndarray:
+    """
+    Noyau RSI (lissage de Wilder) en une seule boucle sur un tableau numpy.
+
+    Reproduit exactement ewm(com=period-1, adjust=False) appliqué aux gains
+    et pertes: récurrence ema += alpha * (x - ema) avec alpha = 1/period,
+    initialisée sur la première variation.
+    """
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    if n < 2:
+        return rsi
+
+    alpha = 1.0 / period
+    delta = close[1] - close[0]
+    ema_up = delta if delta > 0 else 0.0
+    ema_down = -delta if delta < 0 else 0.0
+    rsi[1] = 100.0 - 100.0 / (1.0 + ema_up / ema_down)
+
+    for i in range(2, n):
+        delta = close[i] - close[i - 1]
+        up = delta if delta > 0 else 0.0
+        down = -delta if delta < 0 else 0.0
+        ema_up += alpha * (up - ema_up)
+        ema_down += alpha * (down - ema_down)
+        rsi[i] = 100.0 - 100.0 / (1.0 + ema_up / ema_down)
+
+    return rsi
+
+
+if NUMBA_AVAILABLE:
+    _rsi_kernel = njit(cache=True)(_rsi_kernel)
+
 
 def compute_rsi(series: pd.Series, period: int = 14) -> pd.Series:
     """Calcule le RSI (Relative Strength Index)."""
+    if NUMBA_AVAILABLE:
+        values = _rsi_kernel(series.to_numpy(dtype=np.float64), period)
+        return pd.Series(values, index=series.index)
+
+    # Repli pandas (C-vectorisé) quand numba n'est pas installé
     delta = series.diff()
     up = delta.clip(lower=0)
     down = -1 * delta.clip(upper=0)
@@ -22,13 +73,144 @@ def compute_rsi(series: pd.Series, period: int = 14) -> pd.Series:
     return rsi
 
 
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Moyenne glissante équivalente à rolling(window, min_periods=1).mean()."""
+    n = len(values)
+    out = np.empty(n)
+    head = min(window - 1, n)
+    # Fenêtres incomplètes en tête: moyenne cumulée
+    out[:head] = np.cumsum(values[:head]) / np.arange(1, head + 1)
+    if n >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window)
+        out[window - 1:] = windows.mean(axis=1)
+    return out
+
+
+def _rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Maximum glissant équivalent à rolling(window, min_periods=1).max()."""
+    n = len(values)
+    out = np.empty(n)
+    head = min(window - 1, n)
+    out[:head] = np.maximum.accumulate(values[:head])
+    if n >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window)
+        out[window - 1:] = windows.max(axis=1)
+    return out
+
+
+def _rolling_std_kernel(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Écart-type glissant équivalent à rolling(window, min_periods=1).std().
+
+    Une seule passe de Welford glissant: la moyenne et la somme des carrés
+    des écarts (M2) sont mises à jour incrémentalement à l'entrée et à la
+    sortie de chaque point de la fenêtre. Contrairement à la formule
+    cumsum(x²) - cumsum(x)², aucune soustraction de grands termes presque
+    égaux: le calcul reste stable même sur des séries à forte moyenne.
+    """
+    n = values.shape[0]
+    out = np.empty(n)
+    mean = 0.0
+    m2 = 0.0
+    count = 0
+    for i in range(n):
+        # Entrée de values[i] dans la fenêtre
+        x = values[i]
+        count += 1
+        d = x - mean
+        mean += d / count
+        m2 += d * (x - mean)
+        # Sortie de values[i - window] de la fenêtre
+        if i >= window:
+            y = values[i - window]
+            count -= 1
+            d = y - mean
+            mean -= d / count
+            m2 -= d * (y - mean)
+        if count > 1:
+            var = m2 / (count - 1)
+            out[i] = np.sqrt(var) if var > 0.0 else 0.0
+        else:
+            out[i] = np.nan
+    return out
+
+
+if NUMBA_AVAILABLE:
+    _rolling_std_kernel = njit(cache=True)(_rolling_std_kernel)
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Écart-type glissant équivalent à rolling(window, min_periods=1).std()."""
+    if NUMBA_AVAILABLE:
+        return _rolling_std_kernel(values, window)
+
+    # Repli pandas (C-vectorisé) quand numba n'est pas installé: la boucle
+    # de Welford en Python pur serait ~11x plus lente
+    return pd.Series(values).rolling(window, min_periods=1).std().to_numpy()
+
+
+def precompute_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcule tous les indicateurs techniques en une seule passe sur le DataFrame.
+
+    Les indicateurs sont basés sur des fenêtres glissantes qui ne regardent que
+    vers le passé : la valeur de la ligne i est donc identique qu'on calcule sur
+    df complet ou sur df.iloc[:i+1]. Calculer une fois sur le DataFrame complet
+    évite de recalculer les fenêtres à chaque date de backtest (O(N²) -> O(N)).
+
+    Args:
+        df: DataFrame avec au moins une colonne "Close"
+
+    Returns:
+        Le même DataFrame enrichi des colonnes d'indicateurs
+    """
+    close = df["Close"].to_numpy(dtype=np.float64)
+    n = len(close)
+
+    df["MA50"] = _rolling_mean(close, 50)
+    df["MA200"] = _rolling_mean(close, 200)
+    df["RSI14"] = compute_rsi(df["Close"], 14)
+
+    high90 = _rolling_max(close, 90)
+    df["High90"] = high90
+    df["Drawdown90"] = (high90 - close) / high90
+
+    # Rendements journaliers: le premier point n'existe pas (NaN), la fenêtre
+    # de volatilité glisse donc sur rets[1:]
+    vol20 = np.full(n, np.nan)
+    if n > 1:
+        rets = close[1:] / close[:-1] - 1.0
+        vol20[1:] = _rolling_std(rets, 20)
+    df["Vol20"] = vol20
+
+    momentum30 = np.full(n, np.nan)
+    if n > 30:
+        momentum30[30:] = close[30:] / close[:-30] - 1.0
+    df["Momentum30"] = momentum30
+
+    # Rendement forward à 30 jours (utilisé par le backtest), NaN en queue
+    fwd_ret_30 = np.full(n, np.nan)
+    if n > 30:
+        fwd_ret_30[:-30] = momentum30[30:]
+    df["FwdRet30"] = fwd_ret_30
+
+    return df
+
+
 class ScoringEngine:
-    """Moteur de scoring dynamique configurable via base de données."""
-    
+    """
+    Moteur de scoring dynamique configurable via base de données.
+
+    Le moteur est immuable après construction: la configuration est figée
+    (les formules et leurs poids sont exposés en lecture seule) et aucune
+    méthode ne modifie l'état de l'instance. Une même instance peut donc
+    être partagée entre plusieurs threads sans verrou.
+    """
+
     def __init__(self, config: Dict):
         """
         Initialise le moteur de scoring avec la configuration.
-        
+
         Args:
             config: Dictionnaire contenant:
                 - formulas: formules personnalisées (Dict[str, str])
@@ -39,10 +221,31 @@ class ScoringEngine:
         self.config = config
         self.drawdown_cap = config.get("drawdown_cap", 0.25)
         self.volatility_cap = config.get("volatility_cap", 0.10)
-        
-        # Formules personnalisées définies par l'utilisateur
-        self.formulas = config.get("formulas", {})
-        self.formula_weights = config.get("formula_weights", {})
+
+        # Formules personnalisées définies par l'utilisateur, figées à la
+        # construction (vues en lecture seule, partageables entre threads)
+        self.formulas = MappingProxyType(dict(config.get("formulas", {})))
+        self.formula_weights = MappingProxyType(dict(config.get("formula_weights", {})))
+
+        # Contextes d'évaluation statiques, construits une seule fois et passés
+        # comme globals à eval(): plus aucun dict de contexte alloué par appel
+        self._eval_globals = {
+            "__builtins__": {},
+            "np": np,
+            "min": min,
+            "max": max,
+            "abs": abs,
+            "exp": np.exp,
+            "log": np.log,
+            "sqrt": np.sqrt,
+            "cap": self.drawdown_cap,
+            "drawdown_cap": self.drawdown_cap,
+            "volatility_cap": self.volatility_cap,
+        }
+        # Variante vectorisée: min/max/abs élément par élément
+        self._eval_globals_vectorized = dict(
+            self._eval_globals, min=np.minimum, max=np.maximum, abs=np.abs
+        )
         
         # Log des formules chargées
         if self.formulas:
@@ -68,24 +271,10 @@ class ScoringEngine:
             return 0.0
         
         formula = self.formulas[formula_name]
-        
-        # Contexte d'évaluation sécurisé
-        eval_context = {
-            "np": np,
-            "min": min,
-            "max": max,
-            "abs": abs,
-            "exp": np.exp,
-            "log": np.log,
-            "sqrt": np.sqrt,
-            "cap": self.drawdown_cap,
-            "drawdown_cap": self.drawdown_cap,
-            "volatility_cap": self.volatility_cap,
-            **variables
-        }
-        
+
         try:
-            result = eval(formula, {"__builtins__": {}}, eval_context)
+            # Contexte sécurisé: globals statiques + variables comme locals
+            result = eval(formula, self._eval_globals, variables)
             # S'assurer que le résultat est entre 0 et 1
             return float(np.clip(result, 0.0, 1.0))
         except Exception as e:
@@ -94,6 +283,116 @@ class ScoringEngine:
             logging.debug(f"   Variables: {variables}")
             return 0.0
     
+    def evaluate_formula_vectorized(self, formula_name: str, variables: Dict) -> np.ndarray:
+        """
+        Évalue une formule personnalisée sur des tableaux numpy complets.
+
+        La formule est évaluée une seule fois sur les tableaux alignés, au lieu
+        d'un eval() par ligne. min/max/abs sont remplacés par leurs équivalents
+        élément par élément. Si la formule n'est pas compatible avec les
+        tableaux, on retombe sur l'évaluation scalaire ligne par ligne.
+
+        Args:
+            formula_name: Nom de la formule à évaluer
+            variables: Dictionnaire de np.ndarray alignés (une valeur par signal)
+
+        Returns:
+            Tableau de scores entre 0.0 et 1.0 (0.0 en cas d'erreur)
+        """
+        n = len(variables["close"])
+        if formula_name not in self.formulas:
+            return np.zeros(n)
+
+        formula = self.formulas[formula_name]
+
+        try:
+            result = eval(formula, self._eval_globals_vectorized, variables)
+            result = np.broadcast_to(np.asarray(result, dtype=float), (n,))
+            return np.clip(result, 0.0, 1.0)
+        except Exception as e:
+            logging.debug(f"Formule '{formula_name}' non vectorisable ({e}), repli scalaire")
+            return np.array([
+                self.evaluate_formula(formula_name, {k: float(v[i]) for k, v in variables.items()})
+                for i in range(n)
+            ])
+
+    def compute_scores_vectorized(self, df: pd.DataFrame, idx: np.ndarray) -> pd.DataFrame:
+        """
+        Calcule les scores pour un ensemble de dates de signal en une passe vectorisée.
+
+        Remplace la boucle Python compute_score_at_date-par-date du backtest:
+        les indicateurs sont extraits par fancy-indexing et chaque formule est
+        évaluée une seule fois sur les tableaux complets.
+
+        Args:
+            df: DataFrame enrichi par precompute_indicators()
+            idx: Positions entières des dates de signal
+
+        Returns:
+            DataFrame avec une ligne par signal (mêmes colonnes que
+            compute_score_at_date)
+        """
+        # Extraire toutes les colonnes en un seul bloc numpy, puis ne garder
+        # que les lignes de signal (une conversion au lieu de sept)
+        cols = ["Close", "MA50", "MA200", "RSI14", "Drawdown90", "Vol20", "Momentum30"]
+        values = df[cols].to_numpy(dtype=np.float64)[idx]
+        close, ma50, ma200, rsi14, drawdown90, vol20, momentum30 = values.T
+
+        # Mêmes substitutions de NaN que la version scalaire
+        rsi14 = np.where(np.isnan(rsi14), 50.0, rsi14)
+        drawdown90 = np.nan_to_num(drawdown90)
+        vol20 = np.nan_to_num(vol20)
+        momentum30 = np.nan_to_num(momentum30)
+
+        common_vars = {
+            "close": close,
+            "ma50": ma50,
+            "ma200": ma200,
+            "rsi": rsi14,
+            "rsi14": rsi14,
+            "drawdown": drawdown90,
+            "drawdown90": drawdown90,
+            "vol20": vol20,
+            "volatility": vol20,
+            "momentum": momentum30,
+            "momentum30": momentum30
+        }
+
+        # Calcul dynamique des scores pour chaque formule
+        formula_scores = {}
+        composite = np.zeros(len(idx))
+        total_weight = 0.0
+
+        for formula_name in self.formulas.keys():
+            weight = self.formula_weights.get(formula_name, 0.0)
+            if weight > 0:
+                scores = self.evaluate_formula_vectorized(formula_name, common_vars)
+                formula_scores[formula_name] = scores
+                composite = composite + weight * scores
+                total_weight += weight
+
+        # Normaliser le score composite si les poids ne somment pas à 1
+        if total_weight > 0 and total_weight != 1.0:
+            composite = composite / total_weight
+
+        result = pd.DataFrame({
+            "date": df.index[idx],
+            "score": np.round(100.0 * composite, 1),
+            "close": close,
+            "rsi14": np.round(rsi14, 2),
+            "ma50": ma50,
+            "ma200": ma200,
+            "drawdown90_pct": np.round(drawdown90 * 100.0, 2),
+            "vol20_pct": np.round(vol20 * 100.0, 2),
+            "momentum30_pct": np.round(momentum30 * 100.0, 2),
+        })
+
+        # Ajouter les scores individuels de chaque formule (score_xxx)
+        for formula_name, scores in formula_scores.items():
+            result[f"score_{formula_name}"] = np.round(scores * 100, 1)
+
+        return result
+
     def compute_scores_for_ticker(self, ticker: str, period: str = "365d") -> Optional[Dict]:
         """
         Calcule les scores pour un ticker donné en utilisant les formules personnalisées.
@@ -128,16 +427,11 @@ class ScoringEngine:
         if isinstance(df.columns, pd.MultiIndex):
             df.columns = df.columns.get_level_values(0)
         
-        df = df.dropna().copy()
-        
+        # dropna() renvoie déjà un nouveau DataFrame: pas de .copy() supplémentaire
+        df = df.dropna()
+
         # Calcul des indicateurs techniques
-        df["MA50"] = df["Close"].rolling(50, min_periods=1).mean()
-        df["MA200"] = df["Close"].rolling(200, min_periods=1).mean()
-        df["RSI14"] = compute_rsi(df["Close"], 14)
-        df["High90"] = df["Close"].rolling(90, min_periods=1).max()
-        df["Drawdown90"] = (df["High90"] - df["Close"]) / df["High90"]
-        df["Vol20"] = df["Close"].pct_change().rolling(20, min_periods=1).std()
-        df["Momentum30"] = df["Close"].pct_change(periods=30)
+        df = precompute_indicators(df)
 
         latest = df.iloc[-1]
 
@@ -202,30 +496,25 @@ class ScoringEngine:
     def compute_score_at_date(self, df: pd.DataFrame, date_idx: int) -> Optional[Dict]:
         """
         Calcule le score à une date donnée (pour le backtesting) en utilisant les formules personnalisées.
-        
+
         Args:
-            df: DataFrame avec les données historiques
+            df: DataFrame avec les données historiques, idéalement déjà enrichi
+                par precompute_indicators() (sinon les indicateurs sont calculés ici)
             date_idx: Index de la date pour laquelle calculer le score
-            
+
         Returns:
             Dictionnaire avec le score et les métriques, ou None si pas assez de données
         """
-        historical_data = df.iloc[:date_idx+1].copy()
-        
-        if len(historical_data) < 200:
+        # Sortie anticipée AVANT tout calcul d'indicateur: pas assez d'historique
+        if date_idx + 1 < MIN_HISTORY_DAYS:
             return None
-        
-        # Calcul des indicateurs techniques
-        historical_data["MA50"] = historical_data["Close"].rolling(50, min_periods=1).mean()
-        historical_data["MA200"] = historical_data["Close"].rolling(200, min_periods=1).mean()
-        historical_data["RSI14"] = compute_rsi(historical_data["Close"], 14)
-        historical_data["High90"] = historical_data["Close"].rolling(90, min_periods=1).max()
-        historical_data["Drawdown90"] = (historical_data["High90"] - historical_data["Close"]) / historical_data["High90"]
-        historical_data["Vol20"] = historical_data["Close"].pct_change().rolling(20, min_periods=1).std()
-        historical_data["Momentum30"] = historical_data["Close"].pct_change(periods=30)
-        
-        latest = historical_data.iloc[-1]
-        
+
+        # Compatibilité: calculer les indicateurs si l'appelant ne l'a pas fait
+        if "MA50" not in df.columns:
+            df = precompute_indicators(df.copy())
+
+        latest = df.iloc[date_idx]
+
         # Extraction des métriques
         close = float(latest["Close"])
         ma50 = float(latest["MA50"]) if not np.isnan(latest["MA50"]) else np.nan
@@ -269,7 +558,7 @@ class ScoringEngine:
         
         # Construire le dictionnaire de résultat avec toutes les colonnes de scores
         result = {
-            "date": historical_data.index[-1],
+            "date": df.index[date_idx],
             "score": round(100.0 * composite, 1),
             "close": close,
             "rsi14": round(rsi14, 2),
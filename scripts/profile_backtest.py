@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# scripts/profile_backtest.py
+# Profilage reproductible du chemin de calcul du backtest (sans réseau).
+#
+# Régénère les chiffres cités dans la docstring de core/backtest.py:
+#     python scripts/profile_backtest.py
+#
+# Les données OHLCV sont synthétiques et déterministes (graine fixe), donc
+# le profil ne mesure que le calcul: passe d'indicateurs, évaluation
+# vectorisée des formules et analyse des résultats.
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.backtest import BacktestEngine
+from core.scoring import precompute_indicators
+
+N_BARS = 1100       # ~4,5 ans d'historique quotidien
+N_RUNS = 50         # répétitions pour lisser les mesures
+
+CONFIG = {
+    "drawdown_cap": 0.25,
+    "volatility_cap": 0.10,
+    "cache_downloads": False,
+    "formulas": {
+        "dip": "max(0, -drawdown90) / cap * 100",
+        "oversold": "max(0, 50 - rsi14) * 2",
+        "trend": "(close > ma200) * 100",
+        "calm": "max(0, volatility_cap - vol20) / volatility_cap * 100",
+    },
+    "formula_weights": {"dip": 0.35, "oversold": 0.30, "trend": 0.20, "calm": 0.15},
+}
+
+
+def make_synthetic_ohlcv(n_bars: int = N_BARS) -> pd.DataFrame:
+    """Génère un historique OHLCV déterministe (marche aléatoire à graine fixe)."""
+    rng = np.random.default_rng(42)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, n_bars)))
+    index = pd.date_range("2021-01-01", periods=n_bars, freq="B")
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.002, n_bars)),
+        "High": close * (1 + np.abs(rng.normal(0, 0.004, n_bars))),
+        "Low": close * (1 - np.abs(rng.normal(0, 0.004, n_bars))),
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 5_000_000, n_bars),
+    }, index=index)
+
+
+def time_stage(label: str, fn, n_runs: int = N_RUNS) -> float:
+    """Chronomètre une étape (moyenne sur n_runs) et affiche le résultat."""
+    fn()  # échauffement (caches, compilation numba éventuelle)
+    t0 = time.perf_counter()
+    for _ in range(n_runs):
+        fn()
+    elapsed_ms = (time.perf_counter() - t0) / n_runs * 1e3
+    print(f"  - {label}: {elapsed_ms:.2f} ms")
+    return elapsed_ms
+
+
+def main():
+    df = make_synthetic_ohlcv()
+    engine = BacktestEngine(CONFIG)
+    start_date = df.index[200].strftime("%Y-%m-%d")
+    end_date = df.index[-1].strftime("%Y-%m-%d")
+
+    def full_run():
+        return engine.run_backtest("SYNTH", start_date, end_date, df=df.copy())
+
+    results = full_run()
+    print(f"📊 Profilage sur {N_BARS} barres synthétiques, "
+          f"{len(results)} signaux, {len(CONFIG['formulas'])} formules\n")
+
+    # --- Temps par étape (moyennes, échauffement exclu) ---
+    print("⏱️  Temps par étape:")
+    indicators = precompute_indicators(df.copy())
+    idx = np.arange(200, len(indicators) - 30, 7)
+    total = time_stage("backtest complet (run_backtest)", full_run)
+    t_ind = time_stage("passe d'indicateurs (precompute_indicators)",
+                       lambda: precompute_indicators(df.copy()))
+    t_eval = time_stage("évaluation des formules (compute_scores_vectorized)",
+                        lambda: engine.scoring_engine.compute_scores_vectorized(indicators, idx))
+    t_ana = time_stage("analyse (analyze_results)",
+                       lambda: engine.analyze_results(results))
+    measured = t_ind + t_eval + t_ana
+    print(f"  → répartition: indicateurs {t_ind / measured:.0%}, "
+          f"formules {t_eval / measured:.0%}, analyse {t_ana / measured:.0%} "
+          f"(total run_backtest: {total:.2f} ms)\n")
+
+    # --- cProfile: fonctions les plus coûteuses ---
+    print("🔬 cProfile (top 15 par temps cumulé):")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(N_RUNS):
+        full_run()
+    profiler.disable()
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(15)
+    print(stream.getvalue())
+
+    # --- tracemalloc: pic mémoire d'un backtest ---
+    tracemalloc.start()
+    full_run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"💾 Pic mémoire d'un backtest: {peak / 1024 / 1024:.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
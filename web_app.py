@@ -283,7 +283,7 @@ def backtest_page():
             
             if results_df is not None and not results_df.empty:
                 # Sauvegarder les résultats
-                results_df.to_csv('/data/backtest_results.csv', index=False)
+                results_df.to_parquet('/data/backtest_results.parquet', index=False)
                 
                 # Convertir en format lisible pour le template
                 results = results_df.to_dict('records')